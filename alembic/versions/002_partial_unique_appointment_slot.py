@@ -0,0 +1,55 @@
+"""Unique slot per barber only for non-cancelled appointments.
+
+Revision ID: 002_partial_unique_appointment_slot
+Revises: 001_initial_schema
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = '002_partial_unique_appointment_slot'
+down_revision = '001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    indexes = inspect(bind).get_indexes(table_name)
+    return any(idx['name'] == index_name for idx in indexes)
+
+
+def _unique_exists(bind, table_name: str, constraint_name: str) -> bool:
+    constraints = inspect(bind).get_unique_constraints(table_name)
+    return any(uc['name'] == constraint_name for uc in constraints)
+
+
+def upgrade() -> None:
+    """Reemplazar la restriccion unica por un indice unico parcial"""
+    bind = op.get_bind()
+
+    # Crear primero el nuevo indice: en MySQL la FK de barber_id puede depender
+    # del indice de la restriccion antigua
+    if not _index_exists(bind, 'appointments', 'uq_appointments_barber_active_date'):
+        op.create_index(
+            'uq_appointments_barber_active_date',
+            'appointments',
+            ['barber_id', 'appointment_date'],
+            unique=True,
+            postgresql_where=sa.text("status <> 'cancelled'")
+        )
+
+    if _unique_exists(bind, 'appointments', 'unique_barber_appointment_date'):
+        op.drop_constraint('unique_barber_appointment_date', 'appointments', type_='unique')
+
+
+def downgrade() -> None:
+    """Restaurar la restriccion unica sobre (barber_id, appointment_date)"""
+    op.create_unique_constraint(
+        'unique_barber_appointment_date',
+        'appointments',
+        ['barber_id', 'appointment_date']
+    )
+    op.drop_index('uq_appointments_barber_active_date', table_name='appointments')
@@ -0,0 +1,43 @@
+"""Composite index for appointment listings filtered by status.
+
+Revision ID: 003_appointments_status_date_index
+Revises: 002_partial_unique_appointment_slot
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+revision = '003_appointments_status_date_index'
+down_revision = '002_partial_unique_appointment_slot'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    indexes = inspect(bind).get_indexes(table_name)
+    return any(idx['name'] == index_name for idx in indexes)
+
+
+def upgrade() -> None:
+    """Crear indice (status, appointment_date) y eliminar el indice simple de status"""
+    bind = op.get_bind()
+
+    if not _index_exists(bind, 'appointments', 'ix_appointments_status_date'):
+        op.create_index(
+            'ix_appointments_status_date',
+            'appointments',
+            ['status', 'appointment_date'],
+            unique=False
+        )
+
+    # El indice compuesto ya cubre los filtros por status
+    if _index_exists(bind, 'appointments', 'ix_appointments_status'):
+        op.drop_index('ix_appointments_status', table_name='appointments')
+
+
+def downgrade() -> None:
+    """Restaurar el indice simple de status"""
+    op.create_index('ix_appointments_status', 'appointments', ['status'], unique=False)
+    op.drop_index('ix_appointments_status_date', table_name='appointments')
@@ -0,0 +1,56 @@
+"""Server-side defaults for created_at / updated_at.
+
+Revision ID: 004_server_side_timestamps
+Revises: 003_appointments_status_date_index
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '004_server_side_timestamps'
+down_revision = '003_appointments_status_date_index'
+branch_labels = None
+depends_on = None
+
+
+TIMESTAMP_COLUMNS = [
+    ('barbers', 'created_at'),
+    ('services', 'created_at'),
+    ('appointments', 'created_at'),
+    ('appointments', 'updated_at'),
+]
+
+
+def _utcnow_default(bind):
+    """Hora actual en UTC segun el motor (mismo criterio que models.utcnow)"""
+    if bind.dialect.name == 'postgresql':
+        return sa.text("TIMEZONE('utc', CURRENT_TIMESTAMP)")
+    return sa.text("(UTC_TIMESTAMP())")
+
+
+def upgrade() -> None:
+    """La base de datos asigna las marcas de tiempo al insertar"""
+    default = _utcnow_default(op.get_bind())
+
+    for table_name, column_name in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            server_default=default,
+            existing_type=sa.DateTime(),
+            existing_nullable=False
+        )
+
+
+def downgrade() -> None:
+    """Eliminar los valores por defecto del servidor"""
+    for table_name, column_name in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            server_default=None,
+            existing_type=sa.DateTime(),
+            existing_nullable=False
+        )
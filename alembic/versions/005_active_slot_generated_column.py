@@ -0,0 +1,78 @@
+"""Generated active slot column so MySQL also frees cancelled slots.
+
+Revision ID: 005_active_slot_generated_column
+Revises: 004_server_side_timestamps
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = '005_active_slot_generated_column'
+down_revision = '004_server_side_timestamps'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_SLOT_EXPRESSION = "CASE WHEN status <> 'cancelled' THEN appointment_date END"
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    indexes = inspect(bind).get_indexes(table_name)
+    return any(idx['name'] == index_name for idx in indexes)
+
+
+def _column_exists(bind, table_name: str, column_name: str) -> bool:
+    columns = inspect(bind).get_columns(table_name)
+    return any(col['name'] == column_name for col in columns)
+
+
+def upgrade() -> None:
+    """Unicidad sobre la columna generada en lugar del indice parcial"""
+    bind = op.get_bind()
+
+    if not _column_exists(bind, 'appointments', 'active_appointment_date'):
+        op.add_column(
+            'appointments',
+            sa.Column(
+                'active_appointment_date',
+                sa.DateTime(),
+                sa.Computed(ACTIVE_SLOT_EXPRESSION, persisted=True)
+            )
+        )
+
+    # Crear primero los nuevos indices: en MySQL la FK de barber_id depende
+    # del indice antiguo
+    if not _index_exists(bind, 'appointments', 'ix_appointments_barber_date'):
+        op.create_index(
+            'ix_appointments_barber_date',
+            'appointments',
+            ['barber_id', 'appointment_date']
+        )
+
+    if not _index_exists(bind, 'appointments', 'uq_appointments_barber_active_slot'):
+        op.create_index(
+            'uq_appointments_barber_active_slot',
+            'appointments',
+            ['barber_id', 'active_appointment_date'],
+            unique=True
+        )
+
+    if _index_exists(bind, 'appointments', 'uq_appointments_barber_active_date'):
+        op.drop_index('uq_appointments_barber_active_date', table_name='appointments')
+
+
+def downgrade() -> None:
+    """Restaurar el indice unico parcial sobre (barber_id, appointment_date)"""
+    op.create_index(
+        'uq_appointments_barber_active_date',
+        'appointments',
+        ['barber_id', 'appointment_date'],
+        unique=True,
+        postgresql_where=sa.text("status <> 'cancelled'")
+    )
+    op.drop_index('uq_appointments_barber_active_slot', table_name='appointments')
+    op.drop_index('ix_appointments_barber_date', table_name='appointments')
+    op.drop_column('appointments', 'active_appointment_date')
@@ -0,0 +1,34 @@
+"""Drop ix_appointments_barber_id, covered by ix_appointments_barber_date.
+
+Revision ID: 006_drop_redundant_barber_index
+Revises: 005_active_slot_generated_column
+Create Date: 2026-10-14
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+revision = '006_drop_redundant_barber_index'
+down_revision = '005_active_slot_generated_column'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    indexes = inspect(bind).get_indexes(table_name)
+    return any(idx['name'] == index_name for idx in indexes)
+
+
+def upgrade() -> None:
+    """Eliminar el indice simple de barber_id (prefijo del indice compuesto)"""
+    bind = op.get_bind()
+
+    # En MySQL la FK de barber_id pasa a usar ix_appointments_barber_date
+    if _index_exists(bind, 'appointments', 'ix_appointments_barber_id'):
+        op.drop_index('ix_appointments_barber_id', table_name='appointments')
+
+
+def downgrade() -> None:
+    """Restaurar el indice simple de barber_id"""
+    op.create_index('ix_appointments_barber_id', 'appointments', ['barber_id'], unique=False)
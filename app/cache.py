@@ -0,0 +1,45 @@
+# =====================================================
+# CACHE - Cache en memoria con expiración
+# =====================================================
+
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """Cache en memoria del proceso con expiración por entrada"""
+    
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Valor vigente para la clave, o None si no existe o ha expirado"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guardar un valor; si el cache está lleno se descarta la entrada más antigua"""
+        self._data.pop(key, None)
+        if len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + self.ttl, value)
+    
+    def delete(self, key: Hashable) -> None:
+        """Invalidar una clave"""
+        self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Invalidar todas las entradas"""
+        self._data.clear()
+
+# Horarios disponibles por (barber_id, fecha). Cada worker tiene el suyo y las
+# reservas, cancelaciones y borrados solo lo invalidan en el worker que las atiende:
+# el TTL es el máximo que los demás workers pueden mostrar un horario desfasado
+availability_cache = TTLCache(ttl=5)
@@ -2,10 +2,18 @@
 # CONFIGURACION - FastAPI Application
 # =====================================================
 
-from pydantic_settings import BaseSettings
-from typing import List
+from pydantic import PrivateAttr
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Any, Optional, Tuple
+from functools import lru_cache
 from urllib.parse import quote_plus
 import os
+import secrets
+
+# HS256 necesita una clave de al menos 32 bytes (RFC 7518, sección 3.2)
+JWT_SECRET_MIN_BYTES = 32
+# Valor de ejemplo publicado en versiones anteriores de .env.example
+JWT_SECRET_PLACEHOLDER = "change_me_in_production"
 
 class Settings(BaseSettings):
     """Configuracion de la aplicacion desde variables de entorno"""
@@ -17,29 +25,83 @@ class Settings(BaseSettings):
     db_password: str
     db_name: str
     database_engine: str = "mysql"  # "mysql" o "postgresql"
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    # Tope de conexiones entre todos los workers; deja margen bajo el max_connections
+    # del servidor (151 en MySQL, 100 en PostgreSQL) para migraciones y administración
+    db_max_connections: int = 80
+    db_pool_recycle: int = 1800  # Segundos antes de renovar una conexion
+    db_statement_cache_size: int = 500  # Sentencias preparadas por conexion (asyncpg)
+    db_pool_warmup: int = 5  # Conexiones que se abren al arrancar cada worker (0 = ninguna)
     
     # Application
     app_env: str = "development"
     app_port: int = 3001
     app_host: str = "0.0.0.0"
+    web_concurrency: int = 1  # Workers de gunicorn (lo fija gunicorn_conf.py)
     
     # Admin
     admin_password: str
+    jwt_secret: Optional[str] = None  # Clave para firmar los tokens (obligatoria fuera de desarrollo)
     
     # CORS
     cors_origins: str = "http://localhost:3000,http://localhost:5173"
     
     # Logging
     log_level: str = "INFO"
+    sql_echo: bool = False  # Registrar cada sentencia SQL (solo para depurar)
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    # CORS origins ya parseados (se calculan una vez al construir la configuracion)
+    _cors_origins: Tuple[str, ...] = PrivateAttr(default=())
+    _jwt_signing_key: str = PrivateAttr(default="")
     
-    @property
-    def cors_origins_list(self) -> List[str]:
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
+    
+    def model_post_init(self, __context: Any) -> None:
         """Parsear CORS origins desde string"""
-        return [origin.strip() for origin in self.cors_origins.split(",")]
+        # Ignorar entradas vacías (comas finales o dobles en CORS_ORIGINS)
+        origins = (origin.strip() for origin in self.cors_origins.split(","))
+        self._cors_origins = tuple(origin for origin in origins if origin)
+        
+        # Nunca se firma con la contraseña del admin: un token filtrado permitiría
+        # atacarla por fuerza bruta sin conexión
+        if self.app_env != "development" and (
+            not self.jwt_secret
+            or self.jwt_secret == JWT_SECRET_PLACEHOLDER
+            or len(self.jwt_secret.encode()) < JWT_SECRET_MIN_BYTES
+        ):
+            raise ValueError(
+                f"JWT_SECRET es obligatorio fuera de desarrollo: al menos {JWT_SECRET_MIN_BYTES} bytes aleatorios"
+            )
+        if self.jwt_secret:
+            self._jwt_signing_key = self.jwt_secret
+        else:
+            # Clave aleatoria por proceso: las sesiones no sobreviven a un reinicio
+            self._jwt_signing_key = secrets.token_urlsafe(32)
+    
+    @property
+    def cors_origins_list(self) -> Tuple[str, ...]:
+        """CORS origins como tupla inmutable"""
+        return self._cors_origins
+    
+    @property
+    def db_pool_limits(self) -> Tuple[int, int]:
+        """(pool_size, max_overflow) de cada worker, recortados para no superar db_max_connections entre todos"""
+        per_worker = max(1, self.db_max_connections // max(1, self.web_concurrency))
+        pool_size = min(self.db_pool_size, per_worker)
+        return pool_size, min(self.db_max_overflow, per_worker - pool_size)
+    
+    @property
+    def database_connect_args(self) -> dict:
+        """Argumentos de conexion especificos del driver asincrono"""
+        if self.database_engine == "postgresql":
+            return {"prepared_statement_cache_size": self.db_statement_cache_size}
+        return {}
+    
+    @property
+    def jwt_signing_key(self) -> str:
+        """Clave de firma de los tokens de sesion"""
+        return self._jwt_signing_key
     
     @property
     def database_url(self) -> str:
@@ -48,5 +110,18 @@ class Settings(BaseSettings):
         if self.database_engine == "postgresql":
             return f"postgresql+psycopg2://{self.db_user}:{password}@{self.db_host}:{self.db_port}/{self.db_name}"
         return f"mysql+pymysql://{self.db_user}:{password}@{self.db_host}:{self.db_port}/{self.db_name}?charset=utf8mb4"
+    
+    @property
+    def async_database_url(self) -> str:
+        """Construir URL de conexion asincrona (asyncpg / aiomysql) para la aplicacion"""
+        password = quote_plus(self.db_password)
+        if self.database_engine == "postgresql":
+            return f"postgresql+asyncpg://{self.db_user}:{password}@{self.db_host}:{self.db_port}/{self.db_name}"
+        return f"mysql+aiomysql://{self.db_user}:{password}@{self.db_host}:{self.db_port}/{self.db_name}?charset=utf8mb4"
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Obtener la configuracion, construida una sola vez por proceso"""
+    return Settings()
 
-settings = Settings()
+settings = get_settings()
@@ -2,42 +2,91 @@
 # BASE DE DATOS - SQLAlchemy Configuration
 # =====================================================
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
 from app.config import settings
 from loguru import logger
 
-# Crear engine de SQLAlchemy
-engine = create_engine(
-    settings.database_url,
-    echo=settings.app_env == "development",
+# Pool de cada worker, dentro del tope de conexiones repartido entre todos
+pool_size, max_overflow = settings.db_pool_limits
+
+# Crear engine asincrono de SQLAlchemy (asyncpg / aiomysql)
+engine = create_async_engine(
+    settings.async_database_url,
+    echo=settings.sql_echo,
     pool_pre_ping=True,  # Verificar conexión antes de usarla
-    pool_size=10,
-    max_overflow=20
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    pool_recycle=settings.db_pool_recycle,  # Renovar antes de que el servidor cierre conexiones inactivas
+    query_cache_size=1200,  # Cache de SQL compilado para las consultas de las rutas
+    connect_args=settings.database_connect_args
 )
 
 # Crear SessionLocal para transacciones
-SessionLocal = sessionmaker(
-    autocommit=False,
+# expire_on_commit=False: los objetos siguen siendo legibles tras el commit
+# sin recargas implicitas (no permitidas en sesiones asincronas)
+SessionLocal = async_sessionmaker(
+    bind=engine,
     autoflush=False,
-    bind=engine
+    expire_on_commit=False
 )
 
 # Base para los modelos
 Base = declarative_base()
 
-def get_db():
+# Contador de sentencias SQL de la peticion en curso (lo activa el middleware de desarrollo)
+query_counter: ContextVar[Optional[List[int]]] = ContextVar("query_counter", default=None)
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+async def get_db():
     """Dependencia para obtener sesion de base de datos"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def init_db():
+async def list_by_id(db: AsyncSession, model, skip: int, limit: int, after_id: Optional[int]):
+    """Página de filas ordenadas por ID; con after_id se pagina por cursor en lugar de OFFSET"""
+    stmt = select(model)
+    if after_id is not None:
+        stmt = stmt.where(model.id > after_id)
+    stmt = stmt.order_by(model.id.asc()).offset(skip).limit(limit)
+    result = await db.scalars(stmt)
+    return result.all()
+
+async def update_by_id(db: AsyncSession, model, obj_id: int, values: Dict[str, Any]):
+    """UPDATE de una fila por ID en una sola sentencia; devuelve el objeto actualizado o None"""
+    stmt = update(model).where(model.id == obj_id).values(**values)
+    # RETURNING donde el motor lo soporta; MySQL necesita releer la fila
+    if db.get_bind().dialect.update_returning:
+        return await db.scalar(stmt.returning(model))
+    result = await db.execute(stmt)
+    if not result.rowcount:
+        return None
+    return await db.get(model, obj_id, populate_existing=True)
+
+async def warm_up_pool(connections: int) -> None:
+    """Abrir conexiones del pool al arrancar para que las primeras peticiones no paguen el handshake"""
+    connections = min(connections, pool_size)
+    if connections <= 0:
+        return
+    # Abrirlas a la vez (y no una tras otra) para que cada una sea una conexión nueva
+    opened = await asyncio.gather(*(engine.connect().start() for _ in range(connections)))
+    await asyncio.gather(*(conn.close() for conn in opened))
+    logger.info(f"Pool de conexiones precalentado: {engine.pool.status()}")
+
+async def init_db():
     """Inicializar la base de datos (crear tablas si no existen)"""
     try:
-        Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
         logger.info("Base de datos inicializada correctamente")
     except Exception as e:
         logger.error(f"Error al inicializar la base de datos: {e}")
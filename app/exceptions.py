@@ -0,0 +1,31 @@
+# =====================================================
+# ERRORES - Respuestas HTTP comunes de las rutas
+# =====================================================
+
+from fastapi import HTTPException, status
+
+# Mensajes por entidad (formateados con %, sin f-strings por petición)
+NOT_FOUND_MESSAGES = {
+    "barbero": "Barbero con ID %d no encontrado",
+    "servicio": "Servicio con ID %d no encontrado",
+    "cita": "Cita con ID %d no encontrada",
+}
+
+ALREADY_EXISTS_MESSAGES = {
+    "barbero": "Ya existe un barbero con el nombre '%s'",
+    "servicio": "Ya existe un servicio con el nombre '%s'",
+}
+
+def not_found(entity: str, entity_id: int) -> HTTPException:
+    """Error 404 para una entidad inexistente"""
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=NOT_FOUND_MESSAGES[entity] % entity_id
+    )
+
+def already_exists(entity: str, name: str) -> HTTPException:
+    """Error 400 para un nombre ya registrado"""
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ALREADY_EXISTS_MESSAGES[entity] % name
+    )
@@ -0,0 +1,64 @@
+# =====================================================
+# MIDDLEWARE - ETag para lecturas poco cambiantes
+# =====================================================
+
+import hashlib
+from typing import Iterable
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class ETagMiddleware:
+    """ETag en las respuestas GET 200 de las rutas indicadas y 304 si el cliente ya la tiene
+
+    Middleware ASGI puro: el resto de peticiones pasa directamente a la aplicación,
+    sin envolver send ni acumular el cuerpo.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str]):
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        start_message: Message = {}
+        chunks = []
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    # Errores y redirecciones se envían tal cual
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if not start_message or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            # Se conservan las cabeceras de la respuesta original (CORS incluidas)
+            headers = MutableHeaders(scope=start_message)
+            headers["ETag"] = etag
+            if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+                del headers["content-length"]
+                await send({**start_message, "status": 304})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_with_etag)
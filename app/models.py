@@ -2,12 +2,30 @@
 # MODELOS - SQLAlchemy Models
 # =====================================================
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Numeric, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, Numeric, ForeignKey, Enum, Index, Computed
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import expression
 import enum
 from app.database import Base
 
+class utcnow(expression.FunctionElement):
+    """Fecha/hora actual en UTC calculada por la base de datos"""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+@compiles(utcnow, "mysql")
+def _mysql_utcnow(element, compiler, **kw):
+    return "(UTC_TIMESTAMP())"
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
 class Barber(Base):
     """Modelo para los barberos"""
     __tablename__ = "barbers"
@@ -15,7 +33,7 @@ class Barber(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, nullable=False, index=True)
     phone = Column(String(20))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, server_default=utcnow())
     
     # Relaciones
     appointments = relationship("Appointment", back_populates="barber", cascade="all, delete-orphan")
@@ -31,7 +49,7 @@ class Service(Base):
     name = Column(String(255), unique=True, nullable=False, index=True)
     duration = Column(Integer, nullable=False)  # Duración en minutos
     price = Column(Numeric(10, 2), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, server_default=utcnow())
     
     # Relaciones
     appointments = relationship("Appointment", back_populates="service", cascade="all, delete-orphan")
@@ -54,20 +72,44 @@ class Appointment(Base):
     client_name = Column(String(255), nullable=False, index=True)
     client_phone = Column(String(20))
     barber_id = Column(Integer, ForeignKey("barbers.id"), nullable=False)
-    service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False, index=True)
     appointment_date = Column(DateTime, nullable=False, index=True)
-    status = Column(Enum(AppointmentStatus), default=AppointmentStatus.PENDING, index=True)
+    # Mismo tipo que crea la migración inicial: ENUM 'appointment_status' con los valores en minúscula
+    status = Column(
+        Enum(
+            AppointmentStatus,
+            name="appointment_status",
+            values_callable=lambda statuses: [s.value for s in statuses]
+        ),
+        nullable=False,
+        default=AppointmentStatus.PENDING
+    )
     notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Columna generada: la fecha de la cita mientras no esté cancelada, NULL si lo está.
+    # Equivale a un índice parcial y funciona igual en MySQL (que no los soporta)
+    active_appointment_date = Column(
+        DateTime,
+        Computed("CASE WHEN status <> 'cancelled' THEN appointment_date END", persisted=True)
+    )
+    created_at = Column(DateTime, nullable=False, server_default=utcnow())
+    updated_at = Column(DateTime, nullable=False, server_default=utcnow(), onupdate=utcnow())
     
-    # Relaciones
-    barber = relationship("Barber", back_populates="appointments")
-    service = relationship("Service", back_populates="appointments")
+    # Relaciones (selectin: los listados cargan barberos y servicios en una sola consulta IN)
+    barber = relationship("Barber", back_populates="appointments", lazy="selectin")
+    service = relationship("Service", back_populates="appointments", lazy="selectin")
     
-    # Restricción de unicidad: un barbero no puede tener dos citas a la misma hora
     __table_args__ = (
-        UniqueConstraint('barber_id', 'appointment_date', name='unique_barber_appointment_date'),
+        # Restricción de unicidad: un barbero no puede tener dos citas activas a la misma hora
+        # (las canceladas tienen active_appointment_date NULL y no ocupan el horario)
+        Index(
+            'uq_appointments_barber_active_slot',
+            'barber_id', 'active_appointment_date',
+            unique=True
+        ),
+        # Citas de un barbero por rango de fechas (horarios disponibles, agenda)
+        Index('ix_appointments_barber_date', 'barber_id', 'appointment_date'),
+        # Listados filtrados por estado y ordenados por fecha
+        Index('ix_appointments_status_date', 'status', 'appointment_date'),
     )
     
     def __repr__(self):
@@ -2,198 +2,335 @@
 # RUTAS - Endpoints para Citas
 # =====================================================
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from datetime import datetime, time, timedelta
-from app.database import get_db
-from app.models import Appointment, Barber, Service
-from app.schemas import AppointmentCreate, AppointmentUpdate, AppointmentResponse
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, exists, tuple_, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from app.cache import availability_cache
+from app.database import get_db, update_by_id
+from app.exceptions import not_found
+from app.models import Appointment, AppointmentStatus, Barber, Service
+from app.schemas import (
+    AppointmentCreate, AppointmentUpdate, AppointmentResponse, AppointmentListItem, WallClockDatetime
+)
 
 router = APIRouter()
 
+# Slots de 09:00 a 19:00 cada 30 minutos
+SLOT_TIMES = tuple(
+    (hour, minute)
+    for hour in range(9, 20)
+    for minute in (0, 30)
+    if (hour, minute) <= (19, 0)
+)
+ALL_SLOTS = tuple(f"{hour:02d}:{minute:02d}" for hour, minute in SLOT_TIMES)
+
+# Cada slot es un bit: la ocupación de un día cabe en un entero
+SLOT_BITS = {slot_time: 1 << i for i, slot_time in enumerate(SLOT_TIMES)}
+ALL_SLOTS_MASK = (1 << len(SLOT_TIMES)) - 1
+
+def parse_day(value: str) -> date:
+    """Fecha YYYY-MM-DD de un parámetro de consulta; 400 si el formato no es válido"""
+    # fromisoformat es mucho más rápido que strptime; la forma fija descarta
+    # las demás variantes ISO (20260101, 2026-W01-1)
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Formato de fecha inválido. Use YYYY-MM-DD"
+    )
+
+# Listados: los datos anidados de barbero y servicio sin sus fechas de alta
+LIST_EXCLUDE = {"__all__": {"barber": {"created_at"}, "service": {"created_at"}}}
+
+# Para una sola cita: barbero y servicio en la misma consulta (JOIN) en lugar de selectin
+WITH_RELATIONS = (joinedload(Appointment.barber), joinedload(Appointment.service))
+
+def paginate_appointments(
+    stmt,
+    skip: int,
+    limit: int,
+    status_filter: Optional[AppointmentStatus],
+    date_filter: Optional[str],
+    after_date: Optional[datetime],
+    after_id: Optional[int]
+):
+    """Aplicar a una consulta de citas los filtros, el orden y la paginación de los listados"""
+    # El cursor son los dos valores juntos: con uno solo se devolvería la primera página
+    if (after_date is None) != (after_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_date y after_id deben enviarse juntos"
+        )
+    if after_date is not None:
+        stmt = stmt.where(
+            tuple_(Appointment.appointment_date, Appointment.id) > (after_date, after_id)
+        )
+
+    # Validado como AppointmentStatus: se compara con el ENUM nativo de la columna
+    if status_filter:
+        stmt = stmt.where(Appointment.status == status_filter)
+
+    if date_filter:
+        target_date = parse_day(date_filter)
+        # Filtrar por rango para que se use el índice de appointment_date
+        start_of_day = datetime.combine(target_date, time.min)
+        stmt = stmt.where(
+            Appointment.appointment_date >= start_of_day,
+            Appointment.appointment_date < start_of_day + timedelta(days=1)
+        )
+
+    return stmt.order_by(
+        Appointment.appointment_date.asc(),
+        Appointment.id.asc()
+    ).offset(skip).limit(limit)
+
 # ==================== OBTENER TODAS LAS CITAS ====================
-@router.get("/", response_model=List[AppointmentResponse])
+@router.get(
+    "/",
+    response_model=List[AppointmentResponse],
+    response_model_exclude=LIST_EXCLUDE,
+    response_model_exclude_none=True
+)
 async def get_all_appointments(
     skip: int = 0,
     limit: int = 100,
-    status_filter: str = None,
+    status_filter: AppointmentStatus = None,
     date_filter: str = None,
-    db: Session = Depends(get_db)
+    after_date: WallClockDatetime = None,
+    after_id: int = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Obtener todas las citas con paginación y filtro opcional por estado y fecha"""
-    query = db.query(Appointment)
+    """Obtener todas las citas con paginación y filtro opcional por estado y fecha
 
-    if status_filter:
-        query = query.filter(Appointment.status == status_filter)
+    Para paginar en profundidad, enviar after_date y after_id con los valores de la
+    última cita recibida en lugar de skip.
+    """
+    stmt = paginate_appointments(
+        select(Appointment), skip, limit, status_filter, date_filter, after_date, after_id
+    )
+    result = await db.scalars(stmt)
+    return result.all()
 
-    if date_filter:
-        try:
-            target_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-            query = query.filter(
-                func.date(Appointment.appointment_date) == target_date
-            )
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Formato de fecha inválido. Use YYYY-MM-DD"
-            )
+# ==================== RESUMEN DE CITAS ====================
+@router.get("/summary", response_model=List[AppointmentListItem])
+async def get_appointments_summary(
+    skip: int = 0,
+    limit: int = 100,
+    status_filter: AppointmentStatus = None,
+    date_filter: str = None,
+    after_date: WallClockDatetime = None,
+    after_id: int = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Listado plano de citas (nombres de barbero y servicio en cada fila), mismos filtros que el listado
 
-    appointments = query.order_by(Appointment.appointment_date.asc()).offset(skip).limit(limit).all()
-    return appointments
+    Una sola consulta con JOIN y sin objetos anidados: pensado para agendas y tablas.
+    """
+    stmt = select(
+        Appointment.id,
+        Appointment.client_name,
+        Appointment.appointment_date,
+        Appointment.status,
+        Barber.name.label("barber_name"),
+        Service.name.label("service_name"),
+        Service.duration.label("service_duration"),
+        Service.price.label("service_price")
+    ).join(Appointment.barber).join(Appointment.service)
+    stmt = paginate_appointments(stmt, skip, limit, status_filter, date_filter, after_date, after_id)
+    result = await db.execute(stmt)
+    return result.all()
 
 # ==================== HORARIOS DISPONIBLES ====================
 @router.get("/available-slots")
 async def get_available_slots(
     barberId: int,
     appointmentDate: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Retorna los horarios disponibles para un barbero en una fecha concreta"""
-    try:
-        target_date = datetime.strptime(appointmentDate, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Formato de fecha inválido. Use YYYY-MM-DD"
-        )
+    target_date = parse_day(appointmentDate)
 
-    barber = db.query(Barber).filter(Barber.id == barberId).first()
-    if not barber:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Barbero con ID {barberId} no encontrado"
-        )
+    # Siempre contra la base de datos: un barbero borrado en otro worker da 404 aunque
+    # su disponibilidad siga en el cache de este
+    barber_exists = await db.scalar(select(exists().where(Barber.id == barberId)))
+    if not barber_exists:
+        raise not_found("barbero", barberId)
 
-    start_of_day = datetime.combine(target_date, time(0, 0, 0))
-    end_of_day = datetime.combine(target_date, time(23, 59, 59))
+    cached = availability_cache.get((barberId, target_date))
+    if cached is not None:
+        return {"availableSlots": list(cached)}
 
-    booked = db.query(Appointment).filter(
+    start_of_day = datetime.combine(target_date, time.min)
+    next_day = start_of_day + timedelta(days=1)
+
+    # Solo la hora de las citas no canceladas; el índice único
+    # (barber_id, active_appointment_date) resuelve la consulta por sí solo
+    result = await db.scalars(select(Appointment.active_appointment_date).where(
         Appointment.barber_id == barberId,
-        Appointment.appointment_date >= start_of_day,
-        Appointment.appointment_date <= end_of_day,
-        Appointment.status != "cancelled"
-    ).all()
-
-    booked_times = {appt.appointment_date.strftime("%H:%M") for appt in booked}
-
-    # Slots de 09:00 a 19:00 cada 30 minutos
-    all_slots = []
-    slot = datetime.combine(target_date, time(9, 0))
-    end = datetime.combine(target_date, time(19, 0))
-    while slot <= end:
-        all_slots.append(slot.strftime("%H:%M"))
-        slot += timedelta(minutes=30)
-
-    available = [s for s in all_slots if s not in booked_times]
+        Appointment.active_appointment_date >= start_of_day,
+        Appointment.active_appointment_date < next_day
+    ))
+
+    busy_mask = 0
+    for booked in result:
+        busy_mask |= SLOT_BITS.get((booked.hour, booked.minute), 0)
+    free_mask = ALL_SLOTS_MASK & ~busy_mask
+
+    available = [slot for i, slot in enumerate(ALL_SLOTS) if free_mask >> i & 1]
+    availability_cache.set((barberId, target_date), tuple(available))
     return {"availableSlots": available}
 
 
 # ==================== OBTENER CITA POR ID ====================
 @router.get("/{appointment_id}", response_model=AppointmentResponse)
-async def get_appointment(appointment_id: int, db: Session = Depends(get_db)):
+async def get_appointment(appointment_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener una cita específica por ID"""
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = await db.get(Appointment, appointment_id, options=WITH_RELATIONS)
     if not appointment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Cita con ID {appointment_id} no encontrada"
-        )
+        raise not_found("cita", appointment_id)
     return appointment
 
 # ==================== CREAR CITA ====================
 @router.post("/", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
-async def create_appointment(appointment: AppointmentCreate, db: Session = Depends(get_db)):
+async def create_appointment(appointment: AppointmentCreate, db: AsyncSession = Depends(get_db)):
     """Crear una nueva cita"""
     
-    # Verificar que el barbero existe
-    barber = db.query(Barber).filter(Barber.id == appointment.barber_id).first()
-    if not barber:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Barbero con ID {appointment.barber_id} no encontrado"
-        )
-    
-    # Verificar que el servicio existe
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    if not service:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Servicio con ID {appointment.service_id} no encontrado"
-        )
+    # Verificar que el barbero y el servicio existen (una sola consulta)
+    found = (await db.execute(select(
+        exists().where(Barber.id == appointment.barber_id).label("barber"),
+        exists().where(Service.id == appointment.service_id).label("service")
+    ))).one()
+    if not found.barber:
+        raise not_found("barbero", appointment.barber_id)
     
-    # Verificar que no existe otra cita en la misma fecha/hora para el mismo barbero
-    existing_appointment = db.query(Appointment).filter(
-        Appointment.barber_id == appointment.barber_id,
-        Appointment.appointment_date == appointment.appointment_date,
-        Appointment.status != "cancelled"
-    ).first()
+    if not found.service:
+        raise not_found("servicio", appointment.service_id)
     
-    if existing_appointment:
+    # El índice único (barber_id, active_appointment_date) rechaza citas en un horario ocupado
+    new_appointment = Appointment(**appointment.model_dump())
+    db.add(new_appointment)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"El barbero ya tiene una cita en esa fecha y hora"
+            detail="El barbero ya tiene una cita en esa fecha y hora"
         )
-    
-    new_appointment = Appointment(**appointment.dict())
-    db.add(new_appointment)
-    db.commit()
-    db.refresh(new_appointment)
+    availability_cache.delete((new_appointment.barber_id, new_appointment.appointment_date.date()))
+    await db.refresh(new_appointment)
     return new_appointment
 
+# ==================== CREAR CITAS EN BLOQUE ====================
+# Máximo de citas por petición (p. ej. una cita semanal durante dos años)
+BULK_MAX_APPOINTMENTS = 100
+
+@router.post("/bulk", response_model=List[AppointmentResponse], status_code=status.HTTP_201_CREATED)
+async def create_appointments_bulk(
+    appointments: List[AppointmentCreate] = Body(..., min_length=1, max_length=BULK_MAX_APPOINTMENTS),
+    db: AsyncSession = Depends(get_db)
+):
+    """Crear varias citas en una sola transacción (todas o ninguna)"""
+    # Verificar barberos y servicios con una consulta por tabla
+    barber_ids = {a.barber_id for a in appointments}
+    service_ids = {a.service_id for a in appointments}
+    found_barbers = set(await db.scalars(select(Barber.id).where(Barber.id.in_(barber_ids))))
+    found_services = set(await db.scalars(select(Service.id).where(Service.id.in_(service_ids))))
+    for appointment in appointments:
+        if appointment.barber_id not in found_barbers:
+            raise not_found("barbero", appointment.barber_id)
+        if appointment.service_id not in found_services:
+            raise not_found("servicio", appointment.service_id)
+
+    # Un solo commit; el índice único rechaza el bloque entero si algún horario está ocupado
+    new_appointments = [Appointment(**a.model_dump()) for a in appointments]
+    db.add_all(new_appointments)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El barbero ya tiene una cita en esa fecha y hora"
+        )
+    for appointment in new_appointments:
+        availability_cache.delete((appointment.barber_id, appointment.appointment_date.date()))
+
+    # Recargar todas las citas creadas (valores del servidor y relaciones) en una consulta
+    result = await db.scalars(
+        select(Appointment)
+        .where(Appointment.id.in_([a.id for a in new_appointments]))
+        .order_by(Appointment.appointment_date.asc(), Appointment.id.asc())
+        .execution_options(populate_existing=True)
+    )
+    return result.all()
+
 # ==================== ACTUALIZAR CITA ====================
 @router.put("/{appointment_id}", response_model=AppointmentResponse)
 async def update_appointment(
     appointment_id: int,
     appointment: AppointmentUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar una cita existente"""
-    db_appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-    if not db_appointment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Cita con ID {appointment_id} no encontrada"
-        )
-    
     # Actualizar solo los campos proporcionados
-    update_data = appointment.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_appointment, field, value)
-    
-    db.commit()
-    db.refresh(db_appointment)
+    update_data = appointment.model_dump(exclude_unset=True)
+    if not update_data:
+        db_appointment = await db.get(Appointment, appointment_id, options=WITH_RELATIONS)
+    else:
+        # Un único UPDATE, sin cargar antes la cita;
+        # al reprogramar o reactivar, el índice único rechaza los horarios ocupados
+        try:
+            db_appointment = await update_by_id(db, Appointment, appointment_id, update_data)
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El barbero ya tiene una cita en esa fecha y hora"
+            )
+        # Cambia la ocupación de algún horario (la fecha anterior no se conoce: invalidar todo)
+        if "appointment_date" in update_data or "status" in update_data:
+            availability_cache.clear()
+
+    if not db_appointment:
+        raise not_found("cita", appointment_id)
     return db_appointment
 
 # ==================== ELIMINAR CITA ====================
 @router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_appointment(appointment_id: int, db: Session = Depends(get_db)):
+async def delete_appointment(appointment_id: int, db: AsyncSession = Depends(get_db)):
     """Eliminar una cita permanentemente y liberar el horario"""
-    db_appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-    if not db_appointment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Cita con ID {appointment_id} no encontrada"
-        )
+    result = await db.execute(delete(Appointment).where(Appointment.id == appointment_id))
+    if not result.rowcount:
+        await db.rollback()
+        raise not_found("cita", appointment_id)
 
-    db.delete(db_appointment)
-    db.commit()
+    await db.commit()
+    availability_cache.clear()
     return None
 
 # ==================== OBTENER CITAS DE UN BARBERO ====================
-@router.get("/barber/{barber_id}", response_model=List[AppointmentResponse])
-async def get_barber_appointments(barber_id: int, db: Session = Depends(get_db)):
+@router.get(
+    "/barber/{barber_id}",
+    response_model=List[AppointmentResponse],
+    response_model_exclude=LIST_EXCLUDE,
+    response_model_exclude_none=True
+)
+async def get_barber_appointments(barber_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener todas las citas de un barbero específico"""
     # Verificar que el barbero existe
-    barber = db.query(Barber).filter(Barber.id == barber_id).first()
-    if not barber:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Barbero con ID {barber_id} no encontrado"
-        )
+    barber_exists = await db.scalar(select(exists().where(Barber.id == barber_id)))
+    if not barber_exists:
+        raise not_found("barbero", barber_id)
     
-    appointments = db.query(Appointment).filter(
-        Appointment.barber_id == barber_id
-    ).all()
-    return appointments
+    stmt = select(Appointment).where(Appointment.barber_id == barber_id)
+    result = await db.scalars(stmt)
+    return result.all()
@@ -5,13 +5,15 @@
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from app.config import settings
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import secrets
+import jwt
 
 router = APIRouter()
 
-# Almacenamiento simple de sesiones (en producción usar JWT o Redis)
-active_sessions = {}
+# Sesiones sin estado: el token es un JWT firmado, válido en cualquier worker
+JWT_ALGORITHM = "HS256"
+SESSION_DURATION = timedelta(hours=8)
 
 class LoginRequest(BaseModel):
     """Esquema para login"""
@@ -22,28 +24,29 @@ class LoginResponse(BaseModel):
     token: str
     message: str
 
-# Contraseña del admin desde variables de entorno
+# Contraseña del admin desde variables de entorno (en bytes para compare_digest)
 ADMIN_PASSWORD = settings.admin_password
+ADMIN_PASSWORD_BYTES = ADMIN_PASSWORD.encode()
 
 # ==================== LOGIN ====================
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """Autenticar como admin"""
     
-    if request.password != ADMIN_PASSWORD:
+    # Comparación en tiempo constante para no filtrar la contraseña por tiempos de respuesta
+    if not secrets.compare_digest(request.password.encode(), ADMIN_PASSWORD_BYTES):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Contraseña incorrecta"
         )
     
-    # Generar token único
-    token = secrets.token_urlsafe(32)
-    
-    # Guardar sesión con expiración de 8 horas
-    active_sessions[token] = {
-        "created_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(hours=8)
-    }
+    # Generar token firmado con expiración de 8 horas
+    now = datetime.now(timezone.utc)
+    token = jwt.encode(
+        {"iat": now, "exp": now + SESSION_DURATION},
+        settings.jwt_signing_key,
+        algorithm=JWT_ALGORITHM
+    )
     
     return {
         "token": token,
@@ -55,19 +58,17 @@ async def login(request: LoginRequest):
 async def verify_session(token: str):
     """Verificar si la sesión es válida"""
     
-    if token not in active_sessions:
+    try:
+        jwt.decode(token, settings.jwt_signing_key, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido"
+            detail="Token expirado"
         )
-    
-    session = active_sessions[token]
-    
-    if datetime.utcnow() > session["expires_at"]:
-        del active_sessions[token]
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token expirado"
+            detail="Token inválido"
         )
     
     return {"valid": True, "message": "Token válido"}
@@ -76,8 +77,6 @@ async def verify_session(token: str):
 @router.post("/logout")
 async def logout(token: str):
     """Cerrar sesión"""
-    
-    if token in active_sessions:
-        del active_sessions[token]
-    
+    # Los tokens no se guardan en el servidor: el cliente descarta el suyo
+    # y deja de ser utilizable al expirar
     return {"message": "Sesión cerrada"}
@@ -2,10 +2,13 @@
 # RUTAS - Endpoints para Barberos
 # =====================================================
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from typing import List
-from app.database import get_db
+from app.cache import availability_cache
+from app.database import get_db, list_by_id, update_by_id
+from app.exceptions import already_exists, not_found
 from app.models import Barber
 from app.schemas import BarberCreate, BarberUpdate, BarberResponse
 
@@ -13,72 +16,73 @@ router = APIRouter()
 
 # ==================== OBTENER TODOS LOS BARBEROS ====================
 @router.get("/", response_model=List[BarberResponse])
-async def get_all_barbers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Obtener todos los barberos con paginación"""
-    barbers = db.query(Barber).offset(skip).limit(limit).all()
-    return barbers
+async def get_all_barbers(
+    skip: int = 0,
+    limit: int = 100,
+    after_id: int = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtener todos los barberos con paginación
+
+    Para paginar en profundidad, enviar after_id con el ID del último elemento
+    recibido en lugar de skip.
+    """
+    return await list_by_id(db, Barber, skip, limit, after_id)
 
 # ==================== OBTENER BARBERO POR ID ====================
 @router.get("/{barber_id}", response_model=BarberResponse)
-async def get_barber(barber_id: int, db: Session = Depends(get_db)):
+async def get_barber(barber_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener un barbero específico por ID"""
-    barber = db.query(Barber).filter(Barber.id == barber_id).first()
+    barber = await db.get(Barber, barber_id)
     if not barber:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Barbero con ID {barber_id} no encontrado"
-        )
+        raise not_found("barbero", barber_id)
     return barber
 
 # ==================== CREAR BARBERO ====================
 @router.post("/", response_model=BarberResponse, status_code=status.HTTP_201_CREATED)
-async def create_barber(barber: BarberCreate, db: Session = Depends(get_db)):
+async def create_barber(barber: BarberCreate, db: AsyncSession = Depends(get_db)):
     """Crear un nuevo barbero"""
-    # Verificar si el barbero ya existe
-    existing_barber = db.query(Barber).filter(Barber.name == barber.name).first()
-    if existing_barber:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Ya existe un barbero con el nombre '{barber.name}'"
-        )
-    
-    new_barber = Barber(**barber.dict())
+    # El índice único sobre name rechaza los nombres repetidos
+    new_barber = Barber(**barber.model_dump())
     db.add(new_barber)
-    db.commit()
-    db.refresh(new_barber)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise already_exists("barbero", barber.name)
+    await db.refresh(new_barber)
     return new_barber
 
 # ==================== ACTUALIZAR BARBERO ====================
 @router.put("/{barber_id}", response_model=BarberResponse)
-async def update_barber(barber_id: int, barber: BarberUpdate, db: Session = Depends(get_db)):
+async def update_barber(barber_id: int, barber: BarberUpdate, db: AsyncSession = Depends(get_db)):
     """Actualizar un barbero existente"""
-    db_barber = db.query(Barber).filter(Barber.id == barber_id).first()
+    # Actualizar solo los campos proporcionados, con un único UPDATE
+    update_data = barber.model_dump(exclude_unset=True)
+    if not update_data:
+        db_barber = await db.get(Barber, barber_id)
+    else:
+        try:
+            db_barber = await update_by_id(db, Barber, barber_id, update_data)
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise already_exists("barbero", update_data["name"])
+
     if not db_barber:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Barbero con ID {barber_id} no encontrado"
-        )
-    
-    # Actualizar solo los campos proporcionados
-    update_data = barber.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_barber, field, value)
-    
-    db.commit()
-    db.refresh(db_barber)
+        raise not_found("barbero", barber_id)
     return db_barber
 
 # ==================== ELIMINAR BARBERO ====================
 @router.delete("/{barber_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_barber(barber_id: int, db: Session = Depends(get_db)):
+async def delete_barber(barber_id: int, db: AsyncSession = Depends(get_db)):
     """Eliminar un barbero"""
-    db_barber = db.query(Barber).filter(Barber.id == barber_id).first()
+    db_barber = await db.get(Barber, barber_id)
     if not db_barber:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Barbero con ID {barber_id} no encontrado"
-        )
+        raise not_found("barbero", barber_id)
     
-    db.delete(db_barber)
-    db.commit()
+    await db.delete(db_barber)
+    await db.commit()
+    # El borrado en cascada libera los horarios de sus citas
+    availability_cache.clear()
     return None
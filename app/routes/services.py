@@ -2,10 +2,13 @@
 # RUTAS - Endpoints para Servicios
 # =====================================================
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from typing import List
-from app.database import get_db
+from app.cache import availability_cache
+from app.database import get_db, list_by_id, update_by_id
+from app.exceptions import already_exists, not_found
 from app.models import Service
 from app.schemas import ServiceCreate, ServiceUpdate, ServiceResponse
 
@@ -13,72 +16,73 @@ router = APIRouter()
 
 # ==================== OBTENER TODOS LOS SERVICIOS ====================
 @router.get("/", response_model=List[ServiceResponse])
-async def get_all_services(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Obtener todos los servicios con paginación"""
-    services = db.query(Service).offset(skip).limit(limit).all()
-    return services
+async def get_all_services(
+    skip: int = 0,
+    limit: int = 100,
+    after_id: int = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtener todos los servicios con paginación
+
+    Para paginar en profundidad, enviar after_id con el ID del último elemento
+    recibido en lugar de skip.
+    """
+    return await list_by_id(db, Service, skip, limit, after_id)
 
 # ==================== OBTENER SERVICIO POR ID ====================
 @router.get("/{service_id}", response_model=ServiceResponse)
-async def get_service(service_id: int, db: Session = Depends(get_db)):
+async def get_service(service_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener un servicio específico por ID"""
-    service = db.query(Service).filter(Service.id == service_id).first()
+    service = await db.get(Service, service_id)
     if not service:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Servicio con ID {service_id} no encontrado"
-        )
+        raise not_found("servicio", service_id)
     return service
 
 # ==================== CREAR SERVICIO ====================
 @router.post("/", response_model=ServiceResponse, status_code=status.HTTP_201_CREATED)
-async def create_service(service: ServiceCreate, db: Session = Depends(get_db)):
+async def create_service(service: ServiceCreate, db: AsyncSession = Depends(get_db)):
     """Crear un nuevo servicio"""
-    # Verificar si el servicio ya existe
-    existing_service = db.query(Service).filter(Service.name == service.name).first()
-    if existing_service:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Ya existe un servicio con el nombre '{service.name}'"
-        )
-    
-    new_service = Service(**service.dict())
+    # El índice único sobre name rechaza los nombres repetidos
+    new_service = Service(**service.model_dump())
     db.add(new_service)
-    db.commit()
-    db.refresh(new_service)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise already_exists("servicio", service.name)
+    await db.refresh(new_service)
     return new_service
 
 # ==================== ACTUALIZAR SERVICIO ====================
 @router.put("/{service_id}", response_model=ServiceResponse)
-async def update_service(service_id: int, service: ServiceUpdate, db: Session = Depends(get_db)):
+async def update_service(service_id: int, service: ServiceUpdate, db: AsyncSession = Depends(get_db)):
     """Actualizar un servicio existente"""
-    db_service = db.query(Service).filter(Service.id == service_id).first()
+    # Actualizar solo los campos proporcionados, con un único UPDATE
+    update_data = service.model_dump(exclude_unset=True)
+    if not update_data:
+        db_service = await db.get(Service, service_id)
+    else:
+        try:
+            db_service = await update_by_id(db, Service, service_id, update_data)
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise already_exists("servicio", update_data["name"])
+
     if not db_service:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Servicio con ID {service_id} no encontrado"
-        )
-    
-    # Actualizar solo los campos proporcionados
-    update_data = service.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_service, field, value)
-    
-    db.commit()
-    db.refresh(db_service)
+        raise not_found("servicio", service_id)
     return db_service
 
 # ==================== ELIMINAR SERVICIO ====================
 @router.delete("/{service_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_service(service_id: int, db: Session = Depends(get_db)):
+async def delete_service(service_id: int, db: AsyncSession = Depends(get_db)):
     """Eliminar un servicio"""
-    db_service = db.query(Service).filter(Service.id == service_id).first()
+    db_service = await db.get(Service, service_id)
     if not db_service:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Servicio con ID {service_id} no encontrado"
-        )
+        raise not_found("servicio", service_id)
     
-    db.delete(db_service)
-    db.commit()
+    await db.delete(db_service)
+    await db.commit()
+    # El borrado en cascada libera los horarios de sus citas
+    availability_cache.clear()
     return None
@@ -2,22 +2,32 @@
 # SCHEMAS - Pydantic Models para Validación
 # =====================================================
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, StringConstraints
 from datetime import datetime
-from typing import Optional, List
-from enum import Enum
+from typing import Annotated, Optional, List
+from app.models import AppointmentStatus
+
+# Tipos de texto acotados reutilizados por los esquemas de entrada
+Name255 = Annotated[str, StringConstraints(min_length=1, max_length=255)]
+Phone20 = Annotated[str, StringConstraints(max_length=20)]
+
+# Hora local de la barbería: si el cliente envía un desfase (Z, +02:00) se descarta y se
+# conserva la hora tal cual, como ya hace pymysql. asyncpg rechaza datetimes con zona
+# en columnas TIMESTAMP sin zona
+WallClockDatetime = Annotated[datetime, AfterValidator(lambda value: value.replace(tzinfo=None))]
 
 # ==================== BARBEROS ====================
 
 class BarberCreate(BaseModel):
     """Esquema para crear un barbero"""
-    name: str = Field(..., min_length=1, max_length=255)
-    phone: Optional[str] = Field(None, max_length=20)
+    name: Name255
+    phone: Optional[Phone20] = None
 
 class BarberUpdate(BaseModel):
     """Esquema para actualizar un barbero"""
-    name: Optional[str] = Field(None, min_length=1, max_length=255)
-    phone: Optional[str] = Field(None, max_length=20)
+    # Columnas NOT NULL: se pueden omitir pero no enviar como null
+    name: Name255 = None
+    phone: Optional[Phone20] = None
 
 class BarberResponse(BaseModel):
     """Esquema de respuesta para un barbero"""
@@ -26,22 +36,22 @@ class BarberResponse(BaseModel):
     phone: Optional[str]
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # ==================== SERVICIOS ====================
 
 class ServiceCreate(BaseModel):
     """Esquema para crear un servicio"""
-    name: str = Field(..., min_length=1, max_length=255)
+    name: Name255
     duration: int = Field(..., gt=0)  # Duración en minutos
     price: float = Field(..., gt=0)
 
 class ServiceUpdate(BaseModel):
     """Esquema para actualizar un servicio"""
-    name: Optional[str] = Field(None, min_length=1, max_length=255)
-    duration: Optional[int] = Field(None, gt=0)
-    price: Optional[float] = Field(None, gt=0)
+    # Columnas NOT NULL: se pueden omitir pero no enviar como null
+    name: Name255 = None
+    duration: int = Field(None, gt=0)
+    price: float = Field(None, gt=0)
 
 class ServiceResponse(BaseModel):
     """Esquema de respuesta para un servicio"""
@@ -51,33 +61,26 @@ class ServiceResponse(BaseModel):
     price: float
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # ==================== CITAS ====================
 
-class AppointmentStatus(str, Enum):
-    """Estados de citas"""
-    PENDING = "pending"
-    CONFIRMED = "confirmed"
-    COMPLETED = "completed"
-    CANCELLED = "cancelled"
-
 class AppointmentCreate(BaseModel):
     """Esquema para crear una cita"""
-    client_name: str = Field(..., min_length=1, max_length=255)
-    client_phone: Optional[str] = Field(None, max_length=20)
+    client_name: Name255
+    client_phone: Optional[Phone20] = None
     barber_id: int = Field(..., gt=0)
     service_id: int = Field(..., gt=0)
-    appointment_date: datetime
+    appointment_date: WallClockDatetime
     notes: Optional[str] = None
 
 class AppointmentUpdate(BaseModel):
     """Esquema para actualizar una cita"""
-    client_name: Optional[str] = Field(None, min_length=1, max_length=255)
-    client_phone: Optional[str] = Field(None, max_length=20)
-    appointment_date: Optional[datetime] = None
-    status: Optional[AppointmentStatus] = None
+    # Columnas NOT NULL: se pueden omitir pero no enviar como null
+    client_name: Name255 = None
+    client_phone: Optional[Phone20] = None
+    appointment_date: WallClockDatetime = None
+    status: AppointmentStatus = None
     notes: Optional[str] = None
 
 class AppointmentResponse(BaseModel):
@@ -97,5 +100,17 @@ class AppointmentResponse(BaseModel):
     barber: Optional[BarberResponse] = None
     service: Optional[ServiceResponse] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class AppointmentListItem(BaseModel):
+    """Esquema plano de una cita para listados (sin barbero ni servicio anidados)"""
+    id: int
+    client_name: str
+    appointment_date: datetime
+    status: AppointmentStatus
+    barber_name: str
+    service_name: str
+    service_duration: int
+    service_price: float
+    
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,34 @@
+# =====================================================
+# GUNICORN - Configuración de producción
+# =====================================================
+# Uso: gunicorn main:app -c gunicorn_conf.py
+
+import os
+from uvicorn.workers import UvicornWorker
+
+class ProductionUvicornWorker(UvicornWorker):
+    """Worker de uvicorn con uvloop y httptools explícitos y sin access log"""
+    # Los logs de la aplicación ya pasan por loguru; el access log escribe en cada petición
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "access_log": False}
+
+# Un proceso por worker, cada uno con su propio event loop de uvicorn
+worker_class = "gunicorn_conf.ProductionUvicornWorker"
+
+# 2 * núcleos + 1 por defecto; WEB_CONCURRENCY lo ajusta al plan contratado.
+# sched_getaffinity respeta los núcleos asignados al contenedor (cpu_count da los del host),
+# pero no un límite por cuota: en ese caso conviene fijar WEB_CONCURRENCY
+cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+workers = int(os.getenv("WEB_CONCURRENCY", cpus * 2 + 1))
+
+# Los workers heredan el valor: cada uno reparte DB_MAX_CONNECTIONS entre todos
+# al dimensionar su pool (ver Settings.db_pool_limits)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+bind = f"0.0.0.0:{os.getenv('PORT', os.getenv('APP_PORT', '3001'))}"
+
+# Mantener abiertas las conexiones del balanceador entre peticiones
+# (el worker lo usa como timeout_keep_alive de uvicorn)
+keepalive = 75
+
+# Sin preload: engine y pools se crean dentro de cada worker, no en el proceso maestro
+preload_app = False
@@ -3,13 +3,19 @@
 # =====================================================
 
 import sys
+from contextlib import asynccontextmanager
 from loguru import logger
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import settings
-from app.database import init_db
+from fastapi.responses import ORJSONResponse
+from app.config import get_settings
+from app.database import engine, init_db, query_counter, warm_up_pool
+from app.middleware import ETagMiddleware
 from app.routes import barbers, services, appointments, auth
 
+# Configuracion construida una sola vez por proceso (get_settings esta cacheado)
+settings = get_settings()
+
 # Configurar loguru
 logger.remove()
 logger.add(
@@ -28,13 +34,40 @@ logger.add(
 # Crear aplicacion FastAPI
 docs_url = "/docs" if settings.app_env == "development" else None
 redoc_url = "/redoc" if settings.app_env == "development" else None
+# Sin documentacion en produccion tampoco se sirve (ni se genera) el esquema OpenAPI
+openapi_url = "/openapi.json" if settings.app_env == "development" else None
+
+# Ciclo de vida: inicializar al arrancar y liberar recursos al apagar
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicializar la base de datos al iniciar y cerrar el pool al apagar"""
+    logger.info("Iniciando aplicacion...")
+    try:
+        await init_db()
+        await warm_up_pool(settings.db_pool_warmup)
+        if openapi_url:
+            # Generar el esquema una vez al arrancar y no en la primera visita a /docs
+            app.openapi()
+        logger.info("Aplicacion iniciada correctamente")
+    except Exception as e:
+        logger.error(f"Error al iniciar la aplicacion: {e}")
+        raise
+    
+    yield
+    
+    logger.info("Apagando aplicacion...")
+    await engine.dispose()
 
 app = FastAPI(
     title="Barbershop API",
     description="API para sistema de reservas de barberia",
     version="1.0.0",
     docs_url=docs_url,
-    redoc_url=redoc_url
+    redoc_url=redoc_url,
+    openapi_url=openapi_url,
+    lifespan=lifespan,
+    # orjson serializa listados grandes (datetime incluidos) mucho más rápido que json
+    default_response_class=ORJSONResponse
 )
 
 # Configurar CORS
@@ -46,23 +79,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Eventos de startup
-@app.on_event("startup")
-async def startup_event():
-    """Inicializar la base de datos al iniciar la aplicacion"""
-    logger.info("Iniciando aplicacion...")
-    try:
-        init_db()
-        logger.info("Aplicacion iniciada correctamente")
-    except Exception as e:
-        logger.error(f"Error al iniciar la aplicacion: {e}")
-        raise
+# Detectar posibles N+1 en desarrollo: avisar si una peticion ejecuta demasiadas consultas
+QUERY_WARN_THRESHOLD = 10
 
-# Eventos de shutdown
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Limpiar recursos al apagar la aplicacion"""
-    logger.info("Apagando aplicacion...")
+if settings.app_env == "development":
+    @app.middleware("http")
+    async def count_queries(request: Request, call_next):
+        counter = [0]
+        token = query_counter.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            query_counter.reset(token)
+        if counter[0] > QUERY_WARN_THRESHOLD:
+            logger.warning(
+                f"Posible N+1: {request.method} {request.url.path} ejecutó {counter[0]} consultas SQL"
+            )
+        return response
+
+# ETag en lecturas que casi no cambian entre escrituras: si el cliente ya tiene
+# la misma version se responde 304 sin cuerpo
+ETAG_PATHS = ("/api/v1/barbers", "/api/v1/services", "/health")
+app.add_middleware(ETagMiddleware, paths=ETAG_PATHS)
 
 # Health check
 @app.get("/health", tags=["Health"])
@@ -93,5 +131,10 @@ if __name__ == "__main__":
         "main:app",
         host=settings.app_host,
         port=settings.app_port,
-        reload=settings.app_env == "development"
+        reload=settings.app_env == "development",
+        # uvloop no existe en Windows (uvicorn[standard] no lo instala ahí)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        timeout_keep_alive=75,
+        access_log=settings.app_env == "development"
     )